@@ -1,13 +1,22 @@
 import asyncio
 import logging
 import traceback
-import base64
+import binascii
 import requests
+from requests.adapters import HTTPAdapter
+import httpx
 import streamlit as st
 import threading
 import socket
 import os
+import sys
+import math
+import functools
+import itertools
+from collections.abc import Iterator
+from contextlib import asynccontextmanager
 import numpy as np
+from numba import njit
 from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket, Request
 from fastapi.responses import Response
@@ -15,10 +24,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from google import genai
 from google.genai import types
+from google.genai.live import AsyncSession
 import uvicorn
-from scipy import signal
-import pandas as pd
-import json
+import csv
+import msgspec
+import orjson
 from string import Template
 
 # Load environment variables from .env file
@@ -71,7 +81,23 @@ except Exception as e:
     raise RuntimeError(f"Failed to connect to Gemini: {e}")
 
 # ================== FastAPI ==================
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled (keep-alive, HTTP/2) client for Exotel API calls made from the event loop
+    app.state.exotel_client = httpx.AsyncClient(
+        base_url=f"https://{EXOTEL_SUBDOMAIN}",
+        auth=(EXOTEL_API_KEY, EXOTEL_API_TOKEN),
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20),
+    )
+    # Pay the JIT compile here, not on the first caller's first audio packet
+    warm_up_audio_kernels()
+    try:
+        yield
+    finally:
+        await app.state.exotel_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # ---- Allow WebSocket + API from anywhere (Exotel, ngrok, etc.) ----
 app.add_middleware(
@@ -85,7 +111,37 @@ app.add_middleware(
 CATALOG_FILE = "catalog.csv"
 ORDER_FILE = "order-detail.csv"
 
+# ================== Data Models ==================
+# Structs are slot-based already; frozen (read-only after load) and gc=False (they hold only
+# strings/floats/lists, so can never form cycles) keep them out of the cyclic GC entirely
+class Product(msgspec.Struct, frozen=True, gc=False):
+    sku: str
+    name: str
+    category: str
+    subCategory: str
+    brand: str
+    packOf: str
+    MRP: float
+    PTR: float
+    status: str
+
+class Order(msgspec.Struct, frozen=True, gc=False):
+    name: str
+    phone: str
+    shopName: str
+    address: str
+    pastOrder: list[str]
+    areas: dict[str, list[str]]
+
 # ================== Load Catalog ==================
+def to_float(value) -> float:
+    """Parse a numeric cell; blank or malformed values become 0.0 instead of failing the row."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return number if math.isfinite(number) else 0.0
+
 def load_catalog():
     """Load and clean catalog data (React-style)."""
     try:
@@ -93,29 +149,26 @@ def load_catalog():
             print(f"❌ Catalog file not found at: {os.path.abspath(CATALOG_FILE)}")
             return []
 
-        df = pd.read_csv(CATALOG_FILE)
-        print("✅ Catalog columns:", df.columns.tolist())
-
         cleaned = []
-        for _, row in df.iterrows():
-            try:
-                product = {
-                    "sku": str(row.get("sku", "")).strip(),
-                    "name": str(row.get("name", "")).strip(),
-                    "category": str(row.get("category", "")).strip(),
-                    "subCategory": str(row.get("subCategory", "")).strip(),
-                    "brand": str(row.get("brand", "")).strip(),
-                    "packOf": str(row.get("packOf", "")).strip(),
-                    "MRP": float(row.get("MRP", 0) or 0),
-                    "PTR": float(row.get("PTR", 0) or 0),
-                    "status": str(row.get("status", "")).strip(),
-                }
-                cleaned.append(product)
-            except Exception as e:
-                print("⚠️ Skipped row due to error:", e)
-                continue
-
-        active = [p for p in cleaned if p["sku"] and p["status"].upper() == "ACTIVE"]
+        with open(CATALOG_FILE, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            print("✅ Catalog columns:", reader.fieldnames)
+
+            for row in reader:
+                cleaned.append(Product(
+                    sku=(row.get("sku") or "").strip(),
+                    name=(row.get("name") or "").strip(),
+                    # Low-cardinality fields are interned so all rows share one str object per value
+                    category=sys.intern((row.get("category") or "").strip()),
+                    subCategory=sys.intern((row.get("subCategory") or "").strip()),
+                    brand=sys.intern((row.get("brand") or "").strip()),
+                    packOf=sys.intern((row.get("packOf") or "").strip()),
+                    MRP=to_float(row.get("MRP")),
+                    PTR=to_float(row.get("PTR")),
+                    status=sys.intern((row.get("status") or "").strip()),
+                ))
+
+        active = [p for p in cleaned if p.sku and p.status.upper() == "ACTIVE"]
         print(f"✅ Loaded {len(active)} active catalog items")
         return active
     except Exception as e:
@@ -124,6 +177,24 @@ def load_catalog():
         return []
 
 # ================== Load Orders ==================
+ORDER_TEXT_COLUMNS = {"name": "Name", "phone": "Phone no.", "shopName": "Shop Name", "address": "Address"}
+ORDER_PAST_COLUMN = "Past oder"
+# Area name -> CSV column
+ORDER_AREA_COLUMNS = {
+    "Mayur vihar": "Mayur vihar",
+    "Noida sector 2": "Noida sector 2 ",
+    "Noida sector 16": "Noida sector 16",
+    "Greater Noida west": "Greater Noida west",
+    "Noida sector 18": "Noida sector 18",
+    "Laxmi Nagar": "Laxmi Nagar",
+}
+
+def split_items(value):
+    """Split a comma-separated product cell into a stripped list (empty cell -> [])."""
+    if not value:
+        return []
+    return [s for s in map(str.strip, value.split(",")) if s]
+
 def load_orders():
     """Load and clean customer order history."""
     try:
@@ -131,34 +202,18 @@ def load_orders():
             print(f"❌ Order file not found at: {os.path.abspath(ORDER_FILE)}")
             return []
 
-        df = pd.read_csv(ORDER_FILE)
-        print("✅ Order columns:", df.columns.tolist())
-
         cleaned = []
-        for _, row in df.iterrows():
-            try:
-                order = {
-                    "name": str(row.get("Name", "")).strip(),
-                    "phone": str(row.get("Phone no.", "")).strip(),
-                    "shopName": str(row.get("Shop Name", "")).strip(),
-                    "address": str(row.get("Address", "")).strip(),
-                    "pastOrder": (
-                        [s.strip() for s in str(row.get("Past oder", "")).split(",")]
-                        if row.get("Past oder") else []
-                    ),
-                    "areas": {
-                        "Mayur vihar": [s.strip() for s in str(row.get("Mayur vihar", "")).split(",")] if row.get("Mayur vihar") else [],
-                        "Noida sector 2": [s.strip() for s in str(row.get("Noida sector 2 ", "")).split(",")] if row.get("Noida sector 2 ") else [],
-                        "Noida sector 16": [s.strip() for s in str(row.get("Noida sector 16", "")).split(",")] if row.get("Noida sector 16") else [],
-                        "Greater Noida west": [s.strip() for s in str(row.get("Greater Noida west", "")).split(",")] if row.get("Greater Noida west") else [],
-                        "Noida sector 18": [s.strip() for s in str(row.get("Noida sector 18", "")).split(",")] if row.get("Noida sector 18") else [],
-                        "Laxmi Nagar": [s.strip() for s in str(row.get("Laxmi Nagar", "")).split(",")] if row.get("Laxmi Nagar") else [],
-                    },
-                }
-                cleaned.append(order)
-            except Exception as e:
-                print("⚠️ Skipped order due to error:", e)
-                continue
+        with open(ORDER_FILE, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            print("✅ Order columns:", reader.fieldnames)
+
+            # Every cell is already text (missing/short rows give None), so nothing here can raise per row
+            for row in reader:
+                cleaned.append(Order(
+                    **{key: (row.get(col) or "").strip() for key, col in ORDER_TEXT_COLUMNS.items()},
+                    pastOrder=split_items(row.get(ORDER_PAST_COLUMN)),
+                    areas={area: split_items(row.get(col)) for area, col in ORDER_AREA_COLUMNS.items()},
+                ))
 
         print(f"✅ Loaded {len(cleaned)} customer order records")
         return cleaned
@@ -167,29 +222,31 @@ def load_orders():
         traceback.print_exc()
         return []
     
-def get_customer_by_phone(phone: str, orders):
-    """Find matching customer by phone number."""
-    phone = str(phone).strip()
+def index_orders_by_phone(orders):
+    """Map phone number -> first matching customer record."""
+    index = {}
     for order in orders:
-        if str(order.get("phone", "")).strip() == phone:
-            return order
-    return None
+        phone = order.phone.strip()
+        if phone:
+            index.setdefault(phone, order)
+    return index
+
+def get_customer_by_phone(phone: str, orders_by_phone):
+    """Find matching customer by phone number."""
+    return orders_by_phone.get(str(phone).strip())
 
 compactCatalog = load_catalog()
 lastOrders = load_orders()
+orders_by_phone = index_orders_by_phone(lastOrders)
 # ================== Get Customer Info ==================
 
 customer_phone = "8707550471"  # ← dynamically get from Exotel call event
-customer_data = get_customer_by_phone(customer_phone, lastOrders)
+customer_data = get_customer_by_phone(customer_phone, orders_by_phone)
 
 if customer_data:
-    customer_name = customer_data.get("name", "ग्राहक")
-    customer_area = None
+    customer_name = customer_data.name or "ग्राहक"
     # detect area if needed
-    for area in customer_data.get("areas", {}):
-        if customer_data["areas"][area]:
-            customer_area = area
-            break
+    customer_area = next((area for area, items in customer_data.areas.items() if items), None)
 else:
     customer_name = "ग्राहक"
     customer_area = None
@@ -197,8 +254,25 @@ else:
 
 # ================== Initialize Data ==================
 
-catalog_json = json.dumps(compactCatalog)[:95000]
-orders_json = json.dumps(lastOrders)[:95000]
+PROMPT_JSON_LIMIT = 95000  # max characters of catalog / orders JSON in the prompt
+json_encoder = msgspec.json.Encoder()
+
+def encode_json_array(items, limit: int = PROMPT_JSON_LIMIT) -> str:
+    """Encode whole records until `limit` characters, always returning a valid JSON array."""
+    parts = []
+    total = 2  # "[" and "]"
+    for item in items:
+        # msgspec encodes the Structs straight to UTF-8 JSON in C (no \uXXXX escaping of Hindi text)
+        chunk = json_encoder.encode(item).decode("utf-8")
+        size = len(chunk) + (1 if parts else 0)  # separating comma
+        if total + size > limit:
+            break
+        parts.append(chunk)
+        total += size
+    return "[" + ",".join(parts) + "]"
+
+catalog_json = encode_json_array(compactCatalog)
+orders_json = encode_json_array(lastOrders)
 
 print("SYSTEM PROMPT INITIALIZED ")
 # print("Catalog items loaded:", len(compactCatalog))
@@ -207,10 +281,6 @@ print("Orders loaded:", len(lastOrders))
 # ================== Gemini AI Config ==================
 MODEL = GEMINI_MODEL
 
-# Prepare JSON text (already present earlier)
-# catalog_json = json.dumps(compactCatalog)[:95000]
-# orders_json = json.dumps(lastOrders)[:95000]
-
 # Use Template to avoid issues with literal braces in the prompt
 
 SYSTEM_PROMPT_TEMPLATE = Template(
@@ -625,21 +695,23 @@ bot reply:
 """
 )
 
-# Substitute the actual JSON text into the template
+# Substitute the actual JSON text into the template once at import; catalog/orders are
+# fixed for the life of the process, so every call session reuses this string (via CONFIG)
 SYSTEM_PROMPT = SYSTEM_PROMPT_TEMPLATE.substitute(
     catalog_json=catalog_json,
     orders_json=orders_json,
 )
 
-# Debugging quick-check (optional)
 print("SYSTEM_PROMPT length:", len(SYSTEM_PROMPT))
-print("SYSTEM_PROMPT preview:\n", SYSTEM_PROMPT[:80000])
+# Full prompt dump only on request (it is tens of KB and printed on every start/rerun otherwise)
+if os.getenv("DEBUG_PROMPT"):
+    print("SYSTEM_PROMPT preview:\n", SYSTEM_PROMPT)
+
+# System instruction content built once; CONFIG is shared by every live session
+SYSTEM_INSTRUCTION = types.Content(parts=[types.Part(text=SYSTEM_PROMPT)])
 
-# Rebuild CONFIG using the filled-in SYSTEM_PROMPT
 CONFIG = types.LiveConnectConfig(
-    system_instruction=types.Content(
-        parts=[types.Part(text=SYSTEM_PROMPT)]
-    ),
+    system_instruction=SYSTEM_INSTRUCTION,
     generation_config=types.GenerationConfig(
         response_modalities=["AUDIO"]
     ),
@@ -653,94 +725,262 @@ CONFIG = types.LiveConnectConfig(
 )
 
 # ================== Exotel Utils ==================
-def make_exotel_call(to_number: str):
+# API path (relative to https://{EXOTEL_SUBDOMAIN}) with Account SID in path
+EXOTEL_CALL_PATH = f"/v1/Accounts/{EXOTEL_ACCOUNT_SID}/Calls/connect.json"
+
+def exotel_call_payload(to_number: str) -> dict:
     """
-    Initiate an Exotel call using HTTP Basic Auth
+    Build the form payload for an Exotel call
 
     IMPORTANT: This connects the call to an Exotel Flow that contains a Stream/Voicebot Applet.
     You MUST create a Flow in Exotel's App Bazaar first with a Stream/Voicebot Applet configured
     to connect to your WebSocket endpoint: wss://{NGROK_URL}/ws
     """
-    # API endpoint with subdomain and Account SID in path
-    url = f"https://{EXOTEL_SUBDOMAIN}/v1/Accounts/{EXOTEL_ACCOUNT_SID}/Calls/connect.json"
-
     # IMPORTANT: Use either "To" OR "Url" parameter, NOT BOTH!
     # - Use "To" to connect to another phone number
     # - Use "Url" to connect to a Flow/Applet (for WebSocket streaming)
-    payload = {
+    return {
         "From": to_number,  # The customer's phone number to call first
         "CallerId": EXOTEL_SOURCE,  # Your Exotel virtual number
         "Url": f"http://my.exotel.com/{EXOTEL_ACCOUNT_SID}/exoml/start_voice/{EXOTEL_FLOW_ID}",  # Flow with Stream/Voicebot Applet
     }
 
-    # Use API Key and API Token for authentication (NOT the Account SID)
-    resp = requests.post(url, data=payload, auth=(EXOTEL_API_KEY, EXOTEL_API_TOKEN))
-
-    # Log the response for debugging
+def log_exotel_response(resp, to_number: str):
+    """Log the Exotel API response for debugging"""
     logging.info(f"Exotel API Response Status: {resp.status_code}")
     if resp.status_code != 200:
         logging.error(f"Exotel API Error: {resp.text}")
     else:
         logging.info(f" Call initiated successfully to {to_number}")
 
+@st.cache_resource
+def get_exotel_session() -> requests.Session:
+    """Keep-alive session for the blocking Exotel calls, kept across Streamlit reruns"""
+    session = requests.Session()
+    # Use API Key and API Token for authentication (NOT the Account SID)
+    session.auth = (EXOTEL_API_KEY, EXOTEL_API_TOKEN)
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return session
+
+def make_exotel_call(to_number: str):
+    """Initiate an Exotel call using HTTP Basic Auth (blocking; used by the Streamlit UI)"""
+    resp = get_exotel_session().post(
+        f"https://{EXOTEL_SUBDOMAIN}{EXOTEL_CALL_PATH}",
+        data=exotel_call_payload(to_number),
+        timeout=5,
+    )
+    log_exotel_response(resp, to_number)
+    return resp.json()
+
+async def make_exotel_call_async(client: httpx.AsyncClient, to_number: str):
+    """Initiate an Exotel call through the shared async client (never blocks the event loop)"""
+    resp = await client.post(EXOTEL_CALL_PATH, data=exotel_call_payload(to_number))
+    log_exotel_response(resp, to_number)
     return resp.json()
 
 # ================== Audio Resampling Helper ==================
-def resample_audio(audio_data: bytes, orig_rate: int = 24000, target_rate: int = 8000) -> bytes:
+DECIMATE_3_NUM_TAPS = 63
+
+@functools.lru_cache(maxsize=None)
+def get_decimate_taps() -> np.ndarray:
+    """
+    Design, once, the anti-aliasing lowpass for the fixed 24kHz → 8kHz (3:1) Gemini → Exotel
+    path. scipy.signal is imported here on first use to keep it out of startup.
+    """
+    from scipy import signal
+    return signal.firwin(DECIMATE_3_NUM_TAPS, 1 / 3).astype(np.float32)
+
+@njit(cache=True, fastmath=True)
+def _decimate3(x, taps, history, phase):
+    """
+    Lowpass + keep every 3rd sample, streaming: `history` holds the previous len(taps) - 1
+    input samples (updated in place) and `phase` is the index in `x` of the next output sample.
+    Returns (int16 output, phase for the next chunk).
+    """
+    n = x.shape[0]
+    num_taps = taps.shape[0]
+    hist_len = num_taps - 1
+    n_out = (n - phase + 2) // 3 if n > phase else 0
+    out = np.empty(n_out, dtype=np.int16)
+
+    for j in range(n_out):
+        i = phase + 3 * j
+        acc = np.float32(0.0)
+        for k in range(num_taps):
+            idx = i - k
+            if idx >= 0:
+                acc += taps[k] * np.float32(x[idx])
+            else:
+                acc += taps[k] * history[hist_len + idx]
+        # Clip filter overshoot so loud peaks don't wrap around
+        if acc > 32767.0:
+            acc = 32767.0
+        elif acc < -32768.0:
+            acc = -32768.0
+        out[j] = np.int16(acc)
+
+    # Keep the last hist_len samples of (history + x) for the next chunk
+    if n >= hist_len:
+        for k in range(hist_len):
+            history[k] = np.float32(x[n - hist_len + k])
+    else:
+        for k in range(hist_len - n):
+            history[k] = history[k + n]
+        for k in range(n):
+            history[hist_len - n + k] = np.float32(x[k])
+
+    return out, phase + 3 * n_out - n
+
+def new_resample_state() -> dict:
+    """Filter history + decimation phase carried across one call's outbound audio chunks."""
+    return {"history": np.zeros(DECIMATE_3_NUM_TAPS - 1, dtype=np.float32), "phase": 0}
+
+def resample_audio(audio_data: bytes, state: dict) -> bytes:
     """
     Resample audio from Gemini (24kHz) to Exotel format (8kHz)
 
+    Runs a JIT-compiled 3:1 decimating FIR that keeps filter history in `state`, so chunk
+    boundaries are filtered exactly as if the call's audio were one continuous stream.
+
     Args:
-        audio_data: Raw PCM audio bytes (16-bit, mono)
-        orig_rate: Original sample rate (Gemini outputs 24kHz)
-        target_rate: Target sample rate (Exotel expects 8kHz)
+        audio_data: Raw PCM audio bytes (16-bit, mono, 24kHz)
+        state: Per-call state from new_resample_state()
 
     Returns:
-        Resampled audio bytes  
+        Resampled audio bytes (16-bit, mono, 8kHz)
     """
     try:
-        # Convert bytes to numpy array (16-bit signed integers)
+        # Convert bytes to numpy array (16-bit signed integers) without copying
         audio_array = np.frombuffer(audio_data, dtype=np.int16)
 
-        # Calculate number of samples after resampling
-        num_samples = int(len(audio_array) * target_rate / orig_rate)
-
-        # Resample using scipy's signal.resample
-        resampled_array = signal.resample(audio_array, num_samples)
-
-        # Convert back to 16-bit integers and then to bytes
-        return resampled_array.astype(np.int16).tobytes()
+        resampled_array, state["phase"] = _decimate3(
+            audio_array, get_decimate_taps(), state["history"], state["phase"]
+        )
+        return resampled_array.tobytes()
 
     except Exception as e:
-        logging.error(f"❌ Error resampling audio: {e}")
+        logging.error("❌ Error resampling audio: %s", e)
         # Return original audio if resampling fails
         return audio_data
 
+# ================== Speech Activity Helper ==================
+@njit(cache=True, fastmath=True)
+def _rms_int16(buf):
+    """Single-pass RMS of int16 PCM (no float64 copy, no temporaries)."""
+    n = buf.shape[0]
+    if n == 0:
+        return 0.0
+    s = 0.0
+    for i in range(n):
+        v = float(buf[i])
+        s += v * v
+    return math.sqrt(s / n)
+
+def warm_up_audio_kernels():
+    """
+    Compile (or load from the on-disk cache) the audio JIT kernels and design the FIR taps
+    before the first call. Inputs come from bytes, exactly like live audio, so the read-only
+    array signatures compiled here are the ones the call path uses.
+    """
+    resample_audio(bytes(3 * EXOTEL_CHUNK_BYTES), new_resample_state())
+    _rms_int16(np.frombuffer(bytes(EXOTEL_CHUNK_BYTES), dtype=np.int16))
+
 # ================== Gemini Audio Handler ==================
+EXOTEL_CHUNK_BYTES = 320  # 20ms of 8kHz 16-bit mono PCM; initial size of the inbound buffer
+# Fixed JSON envelope of an outbound media frame; base64 never needs escaping inside it
+EXOTEL_MEDIA_PREFIX = b'{"event":"media","media":{"payload":"'
+EXOTEL_MEDIA_SUFFIX = b'"}}'
+
+def encode_media_frame(audio_data: bytes, resample_state: dict) -> bytes:
+    """Turn one Gemini audio chunk into a complete Exotel media frame"""
+    # Resample from Gemini's 24kHz to Exotel's 8kHz
+    resampled_audio = resample_audio(audio_data, resample_state)
+
+    # Encode to base64 for Exotel
+    audio_base64 = binascii.b2a_base64(resampled_audio, newline=False)
+    return EXOTEL_MEDIA_PREFIX + audio_base64 + EXOTEL_MEDIA_SUFFIX
+
+def iter_response_audio(
+    response: types.LiveServerMessage, server_content: types.LiveServerContent | None
+) -> Iterator[bytes]:
+    """Yield the raw audio bytes carried by a Gemini response, wherever the SDK put them"""
+    if server_content:
+        # inline_data directly on server_content
+        inline_data = getattr(server_content, "inline_data", None)
+        if inline_data:
+            yield inline_data.data
+            return
+
+        # model_turn with parts
+        model_turn = getattr(server_content, "model_turn", None)
+        if model_turn:
+            for part in getattr(model_turn, "parts", None) or ():
+                inline_data = getattr(part, "inline_data", None)
+                if inline_data:
+                    yield inline_data.data
+        return
+
+    # data attribute directly on response
+    data = getattr(response, "data", None)
+    if data:
+        yield data
+
 class AudioLoop:
-    def __init__(self, websocket: WebSocket):
-        self.websocket = websocket
-        self.session = None
-        self.running = True
-        self.audio_buffer = []
-        self.buffer_size = 1  # Send audio in near real-time for better responsiveness
-        self.last_audio_had_sound = False
-
-    def stop(self):
+    def __init__(self, websocket: WebSocket) -> None:
+        self.websocket: WebSocket = websocket
+        self.session: AsyncSession | None = None
+        self.running: bool = True
+        self.buffer_size: int = 1  # Send audio in near real-time for better responsiveness
+        # Reused inbound buffer (only when buffer_size > 1): write cursor + packet count, never reallocated per flush
+        self.audio_buffer: bytearray = bytearray(self.buffer_size * EXOTEL_CHUNK_BYTES)
+        self.buffer_len: int = 0
+        self.buffered_chunks: int = 0
+        self.last_audio_had_sound: bool = False
+        # Running total of Exotel packets forwarded to Gemini (advances by buffer_size per send)
+        self.chunk_counter: Iterator[int] = itertools.count(self.buffer_size, self.buffer_size)
+        self.resample_state: dict = new_resample_state()  # 24kHz → 8kHz filter history across chunks
+        self.audio_sent_count: int = 0
+
+    def stop(self) -> None:
         self.running = False
 
+    def buffer_audio(self, audio_bytes: bytes) -> bytes | None:
+        """Append a packet to the reusable buffer; return the combined audio once buffer_size packets are in"""
+        end = self.buffer_len + len(audio_bytes)
+        if end > len(self.audio_buffer):
+            self.audio_buffer.extend(bytes(end - len(self.audio_buffer)))
+        self.audio_buffer[self.buffer_len:end] = audio_bytes
+        self.buffer_len = end
+        self.buffered_chunks += 1
+        if self.buffered_chunks < self.buffer_size:
+            return None
+        return self.take_buffered_audio()
+
+    def take_buffered_audio(self) -> bytes:
+        """Copy out the buffered audio and reset the cursor (the buffer itself is kept)"""
+        combined = bytes(memoryview(self.audio_buffer)[:self.buffer_len])
+        self.buffer_len = 0
+        self.buffered_chunks = 0
+        return combined
+
     def has_audio_activity(self, audio_bytes: bytes, threshold: int = 500) -> bool:
         """Check if audio contains activity (not just silence)"""
-        try:
-            audio_array = np.frombuffer(audio_bytes, dtype=np.int16)
-            # Calculate RMS (Root Mean Square) to detect audio activity
-            rms = np.sqrt(np.mean(np.square(audio_array.astype(np.float64))))
-            return rms > threshold
-        except Exception as e:
-            logging.debug(f"Speech detection error: {e}")
-            return True  # Assume activity if we can't check
-
-    async def run(self):
+        # Calculate RMS (Root Mean Square) to detect audio activity; count drops a stray odd
+        # trailing byte, which would otherwise make frombuffer raise and end the call
+        audio_array = np.frombuffer(audio_bytes, dtype=np.int16, count=len(audio_bytes) // 2)
+        return _rms_int16(audio_array) > threshold
+
+    async def _emit_audio(self, audio_data: bytes) -> None:
+        """Resample one Gemini audio chunk to 8kHz and send it to Exotel as a media frame"""
+        # Inline on purpose: the JIT resample + encode takes ~13µs per chunk, less than a thread hop
+        frame = encode_media_frame(audio_data, self.resample_state)
+
+        # Send audio back to Exotel
+        await self.websocket.send_text(frame.decode("ascii"))
+        self.audio_sent_count += 1
+        logging.debug("📤 Sent %d byte audio frame to Exotel (resampled from %d bytes)", len(frame), len(audio_data))
+
+    async def run(self) -> None:
         try:
             async with (
                 client.aio.live.connect(model=MODEL, config=CONFIG) as session,
@@ -754,15 +994,14 @@ class AudioLoop:
                 tg.create_task(self.receive_from_exotel())
                 tg.create_task(self.send_to_exotel())
         except Exception as e:
-            logging.error(f"❌ Error in AudioLoop: {e}")
-            traceback.print_exc()
+            logging.exception("❌ Error in AudioLoop: %s", e)
 
-    async def receive_from_exotel(self):
+    async def receive_from_exotel(self) -> None:
         """Receive audio from Exotel WebSocket and send to Gemini"""
         try:
             while self.running:
                 # Receive message from Exotel
-                message = await self.websocket.receive_json()
+                message = orjson.loads(await self.websocket.receive_text())
                 event = message.get("event")
 
                 if event == "start":
@@ -775,27 +1014,16 @@ class AudioLoop:
 
                     if media_payload:
                         # Decode base64 audio
-                        audio_bytes = base64.b64decode(media_payload)
-
-                        # Add to buffer
-                        self.audio_buffer.append(audio_bytes)
+                        audio_bytes = binascii.a2b_base64(media_payload)  # accepts the ASCII str directly
 
-                        # Send buffered audio when we have enough chunks
-                        if len(self.audio_buffer) >= self.buffer_size:
-                            # Combine buffered chunks
-                            combined_audio = b''.join(self.audio_buffer)
-
-                            # Check if audio contains actual sound
-                            has_sound = self.has_audio_activity(combined_audio)
-
-                            # Log speech detection
-                            if has_sound and not self.last_audio_had_sound:
-                                logging.info("🎤 SPEECH DETECTED in user audio!")
-                                self.last_audio_had_sound = True
-                            elif not has_sound and self.last_audio_had_sound:
-                                logging.info("🔇 Silence detected")
-                                self.last_audio_had_sound = False
+                        if self.buffer_size <= 1:
+                            # Near real-time: forward each packet as-is, no buffering or copy
+                            combined_audio = audio_bytes
+                        else:
+                            # Send buffered audio when we have enough chunks
+                            combined_audio = self.buffer_audio(audio_bytes)
 
+                        if combined_audio is not None:
                             # Send audio to Gemini using correct API signature
                             # Exotel sends 8kHz PCM audio (16-bit, mono)
                             try:
@@ -806,51 +1034,58 @@ class AudioLoop:
                                     )
                                 )
                             except Exception as e:
-                                logging.error(f"❌ Failed to send audio to Gemini: {e}")
+                                logging.error("❌ Failed to send audio to Gemini: %s", e)
 
-                            # Clear buffer
-                            self.audio_buffer = []
+                            # Check if audio contains actual sound (logging only; silence is still
+                            # forwarded because Gemini's own VAD needs it to detect end of speech)
+                            has_sound = self.has_audio_activity(combined_audio)
+
+                            # Log speech detection
+                            if has_sound and not self.last_audio_had_sound:
+                                logging.info("🎤 SPEECH DETECTED in user audio!")
+                                self.last_audio_had_sound = True
+                            elif not has_sound and self.last_audio_had_sound:
+                                logging.info("🔇 Silence detected")
+                                self.last_audio_had_sound = False
 
                             # Log every audio send for debugging
-                            if not hasattr(self, 'chunk_count'):
-                                self.chunk_count = 0
-                            self.chunk_count += self.buffer_size
-                            if self.chunk_count % 10 == 0:
-                                logging.info(f"📥 Sent {self.chunk_count} audio chunks ({len(combined_audio)} bytes) from Exotel → Gemini")
+                            chunk_count = next(self.chunk_counter)
+                            if chunk_count % 10 == 0:
+                                logging.debug("📥 Sent %d audio chunks (%d bytes) from Exotel → Gemini", chunk_count, len(combined_audio))
 
                 elif event == "stop":
                     logging.info("📞 Call ended by customer")
 
                     # Flush any remaining buffered audio
-                    if self.audio_buffer:
-                        combined_audio = b''.join(self.audio_buffer)
+                    if self.buffered_chunks:
+                        flushed_chunks = self.buffered_chunks
+                        combined_audio = self.take_buffered_audio()
                         await self.session.send_realtime_input(
                             audio=types.Blob(
                                 data=combined_audio,
                                 mime_type="audio/pcm;rate=8000"
                             )
                         )
-                        logging.info(f"📤 Flushed {len(self.audio_buffer)} remaining audio chunks")
-                        self.audio_buffer = []
+                        logging.info(f"📤 Flushed {flushed_chunks} remaining audio chunks")
 
                     self.running = False
                     break
 
                 else:
-                    logging.debug(f"🔔 Received event: {event}")
+                    logging.debug("🔔 Received event: %s", event)
 
         except Exception as e:
-            logging.error(f"❌ Error receiving from Exotel: {e}")
-            traceback.print_exc()
+            logging.exception("❌ Error receiving from Exotel: %s", e)
             self.running = False
 
-    async def send_to_exotel(self):
+    async def send_to_exotel(self) -> None:
         """Receive audio from Gemini and send to Exotel WebSocket"""
         try:
             logging.info("🎧 Starting to listen for Gemini responses...")
             response_count = 0
-            audio_sent_count = 0
             turn_number = 0
+            # Checked once per call so per-response debug logging costs nothing when disabled
+            debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
 
             # Outer loop for continuous multi-turn conversation
             while self.running:
@@ -866,88 +1101,27 @@ class AudioLoop:
                     response_count += 1
 
                     # Log response details
-                    logging.info(f"📨 Response #{response_count} from Gemini - Type: {type(response).__name__}")
+                    if debug_enabled:
+                        logging.debug("📨 Response #%d from Gemini - Type: %s", response_count, type(response).__name__)
 
                     # Heartbeat
                     if response_count % 20 == 0:
-                        logging.info(f"💓 Heartbeat: Processed {response_count} responses, sent {audio_sent_count} audio chunks")
+                        logging.info(f"💓 Heartbeat: Processed {response_count} responses, sent {self.audio_sent_count} audio chunks")
 
                     # Log text responses
                     if text := response.text:
                         logging.info(f"🤖 Gemini Text: {text}")
 
+                    server_content = getattr(response, "server_content", None)
+
+                    # Check for turn_complete to break from inner loop
+                    if server_content and getattr(server_content, "turn_complete", None):
+                        logging.info(f"✅ Turn #{turn_number} complete - Ready for next turn")
+                        break  # Exit inner loop only, continue outer loop for next turn
+
                     # Handle audio responses from Gemini
-                    if hasattr(response, 'server_content') and response.server_content:
-                        server_content = response.server_content
-
-                        # Check for turn_complete to break from inner loop
-                        if hasattr(server_content, 'turn_complete') and server_content.turn_complete:
-                            logging.info(f"✅ Turn #{turn_number} complete - Ready for next turn")
-                            break  # Exit inner loop only, continue outer loop for next turn
-
-                        # Check for inline_data directly in server_content
-                        if hasattr(server_content, 'inline_data') and server_content.inline_data:
-                            audio_data = server_content.inline_data.data
-
-                            # Resample from Gemini's 24kHz to Exotel's 8kHz
-                            resampled_audio = resample_audio(audio_data)
-
-                            # Encode to base64 for Exotel
-                            audio_base64 = base64.b64encode(resampled_audio).decode('utf-8')
-
-                            # Send audio back to Exotel
-                            await self.websocket.send_json({
-                                "event": "media",
-                                "media": {
-                                    "payload": audio_base64
-                                }
-                            })
-                            audio_sent_count += 1
-                            logging.info(f"📤 Sent {len(resampled_audio)} bytes of audio to Exotel (resampled from {len(audio_data)} bytes)")
-
-                        # Check for model_turn with parts
-                        elif hasattr(server_content, 'model_turn') and server_content.model_turn:
-                            model_turn = server_content.model_turn
-                            if hasattr(model_turn, 'parts'):
-                                for part in model_turn.parts:
-                                    if hasattr(part, 'inline_data') and part.inline_data:
-                                        audio_data = part.inline_data.data
-
-                                        # Resample from Gemini's 24kHz to Exotel's 8kHz
-                                        resampled_audio = resample_audio(audio_data)
-
-                                        # Encode to base64 for Exotel
-                                        audio_base64 = base64.b64encode(resampled_audio).decode('utf-8')
-
-                                        # Send audio back to Exotel
-                                        await self.websocket.send_json({
-                                            "event": "media",
-                                            "media": {
-                                                "payload": audio_base64
-                                            }
-                                        })
-                                        audio_sent_count += 1
-                                        logging.info(f"📤 Sent {len(resampled_audio)} bytes of audio to Exotel (resampled from {len(audio_data)} bytes)")
-
-                    # Also check for data attribute directly on response
-                    elif hasattr(response, 'data') and response.data:
-                        audio_data = response.data
-
-                        # Resample from Gemini's 24kHz to Exotel's 8kHz
-                        resampled_audio = resample_audio(audio_data)
-
-                        # Encode to base64 for Exotel
-                        audio_base64 = base64.b64encode(resampled_audio).decode('utf-8')
-
-                        # Send audio back to Exotel
-                        await self.websocket.send_json({
-                            "event": "media",
-                            "media": {
-                                "payload": audio_base64
-                            }
-                        })
-                        audio_sent_count += 1
-                        logging.info(f"📤 Sent {len(resampled_audio)} bytes of audio to Exotel (resampled from {len(audio_data)} bytes)")
+                    for audio_data in iter_response_audio(response, server_content):
+                        await self._emit_audio(audio_data)
 
                 # If inner loop exits normally (not via break), log it
                 logging.info(f"📭 Turn #{turn_number} receive loop completed")
@@ -955,8 +1129,7 @@ class AudioLoop:
             logging.info("🛑 Outer conversation loop ended")
 
         except Exception as e:
-            logging.error(f"❌ Error sending to Exotel: {e}")
-            traceback.print_exc()
+            logging.exception("❌ Error sending to Exotel: %s", e)
             self.running = False
         finally:
             logging.warning("⚠️ send_to_exotel method ended")
@@ -972,8 +1145,7 @@ async def websocket_bridge(ws: WebSocket):
     try:
         await ai_loop.run()
     except Exception as e:
-        logging.error(f"❌ WebSocket error: {e}")
-        traceback.print_exc()
+        logging.exception("❌ WebSocket error: %s", e)
     finally:
         logging.info("📞 WebSocket connection closed")
 
@@ -982,8 +1154,8 @@ class CallRequest(BaseModel):
     to: str
 
 @app.post("/make-call")
-async def make_call(req: CallRequest):
-    response = make_exotel_call(req.to)
+async def make_call(req: CallRequest, request: Request):
+    response = await make_exotel_call_async(request.app.state.exotel_client, req.to)
     logging.info(f"📞 Exotel call initiated to {req.to}")
     return response
 
@@ -1022,11 +1194,24 @@ if __name__ == "__main__":
         default_port = int(os.getenv("PORT", 8501))
         port = get_free_port(default_port)
         print(f"🚀 Starting FastAPI on port {port}")
-        uvicorn.run(app, host="0.0.0.0", port=port, log_level="info", access_log=False)
+        # uvloop (libuv event loop) + httptools (C HTTP parser) for the WebSocket audio path
+        uvicorn.run(
+            app, host="0.0.0.0", port=port, log_level="info", access_log=False,
+            loop="uvloop", http="httptools", ws="websockets",
+        )
 
-    # Prevent multiple FastAPI restarts in Streamlit reruns
-    if not any(t.name == "FastAPIThread" for t in threading.enumerate()):
-        threading.Thread(target=run_fastapi, name="FastAPIThread", daemon=True).start()
+    # Prevent multiple FastAPI restarts in Streamlit reruns: cache_resource is process-wide,
+    # so every rerun and every browser session gets the one already-running server thread
+    @st.cache_resource
+    def start_fastapi() -> threading.Thread:
+        thread = threading.Thread(target=run_fastapi, name="FastAPIThread", daemon=True)
+        thread.start()
+        return thread
+
+    # If the server thread died (e.g. port bind failure), drop it so this rerun starts a new one
+    if not start_fastapi().is_alive():
+        start_fastapi.clear()
+        start_fastapi()
 
     # Run Streamlit UI
     streamlit_ui()